@@ -0,0 +1,78 @@
+import joblib
+import numpy as np
+from degraded import extract_for_level
+from query_engine import get_engine
+
+MODEL_PATH = "model/mood_model.pkl"
+ENCODER_PATH = "model/label_encoder.pkl"
+CONFIDENCE_THRESHOLD = 0.55
+
+_model = None
+_encoder = None
+
+
+def load_models():
+    """Load the mood model and label encoder once per process."""
+    global _model, _encoder
+    if _model is None:
+        _model = joblib.load(MODEL_PATH)
+        _encoder = joblib.load(ENCODER_PATH)
+    return _model, _encoder
+
+
+def classify(features):
+    """Return (mood_label, confidence, probabilities) for a feature vector."""
+    model, encoder = load_models()
+    features = np.asarray(features, dtype=float).reshape(1, -1)
+    probs = model.predict_proba(features)[0]
+    mood_idx = int(np.argmax(probs))
+    confidence = float(probs[mood_idx])
+
+    if confidence < CONFIDENCE_THRESHOLD:
+        mood_label = "uncertain"
+    else:
+        mood_label = encoder.inverse_transform([mood_idx])[0]
+
+    probabilities = {
+        str(label): float(p) for label, p in zip(encoder.classes_, probs)
+    }
+    return mood_label, confidence, probabilities
+
+
+def analyze_vector(features, bpm, mood=None):
+    """Classify a feature vector (unless a mood is given) and recommend tracks."""
+    features = np.asarray(features, dtype=float)
+    bpm = float(bpm)
+
+    if mood is None:
+        mood, confidence, probabilities = classify(features)
+    else:
+        confidence, probabilities = None, None
+
+    recommendations = [
+        {"track_id": track_id, "score": score}
+        for track_id, score in get_engine().search(features, bpm, mood)
+    ]
+
+    return {
+        "mood": mood,
+        "confidence": confidence,
+        "probabilities": probabilities,
+        "bpm": bpm,
+        "recommendations": recommendations
+    }
+
+
+def analyze_file(audio_path, level="full"):
+    """Extract features from an audio file and analyze them.
+
+    level selects a cheaper analysis from degraded.LEVELS; the result says
+    which one was used. Returns None when the file cannot be decoded.
+    """
+    features, bpm = extract_for_level(audio_path, level)
+    if features is None:
+        return None
+    result = analyze_vector(features, bpm)
+    result["analysis_level"] = level
+    result["degraded"] = level != "full"
+    return result
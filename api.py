@@ -0,0 +1,344 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from analysis import analyze_file, analyze_vector
+from database import log_query
+from neighbors import similar_tracks
+from timeline import mood_timeline
+from catalog_index import load_index
+from playlist import build_playlist
+from degraded import LoadController
+from query_engine import close_engine
+from sharded_search import ShardError
+
+UPLOAD_DIR = "logs/uploads"
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+MAX_BATCH_SIZE = 32
+# Whole multipart batch, with some room for part headers and boundaries
+MAX_BATCH_BYTES = MAX_BATCH_SIZE * MAX_UPLOAD_BYTES + CHUNK_SIZE
+AUDIO_SUFFIXES = (".wav", ".mp3")
+
+api = FastAPI(title="PlayMood API")
+
+# Audio decoding and feature extraction are CPU bound; run them in worker
+# processes so the event loop only shuffles bytes.
+_pool = None
+
+# Under load, uploads are analyzed with cheaper extraction and flagged as degraded
+load_controller = LoadController()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+@api.on_event("shutdown")
+def shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+    close_engine()
+
+
+def _analyze_upload(path, level="full"):
+    """Worker-process entry point: analyze a spooled upload, then delete it."""
+    try:
+        result = analyze_file(path, level)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if result is not None:
+        try:
+            log_query(result["mood"], result["bpm"], [r["track_id"] for r in result["recommendations"]])
+        except Exception:
+            pass
+    return result
+
+
+def _timeline_upload(path, level="full"):
+    """Worker-process entry point: build a mood timeline, then delete the upload.
+
+    Timelines have no cheaper level; they always run in full but still count
+    towards the load that picks the level for other uploads.
+    """
+    try:
+        return mood_timeline(path)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _analyze_vector(features, bpm, mood=None):
+    result = analyze_vector(features, bpm, mood=mood)
+    try:
+        log_query(result["mood"], result["bpm"], [r["track_id"] for r in result["recommendations"]])
+    except Exception:
+        pass
+    return result
+
+
+def _suffix_for(filename):
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return suffix if suffix in AUDIO_SUFFIXES else ".wav"
+
+
+def _new_upload_file(filename):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=_suffix_for(filename), dir=UPLOAD_DIR)
+    return os.fdopen(fd, "wb"), path
+
+
+async def _spool_chunks(chunks, filename):
+    """Write an async iterator of byte chunks to disk without buffering it all."""
+    out, path = _new_upload_file(filename)
+    size = 0
+    try:
+        with out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+                # File writes are small and buffered; keep them off the loop anyway.
+                await _run_in_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    if size == 0:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Empty upload")
+    return path
+
+
+async def _iter_upload(upload):
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Request body is not valid JSON")
+
+
+def _parse_vector(payload):
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Expected {'features': [...], 'bpm': number}")
+    try:
+        features = [float(x) for x in payload["features"]]
+        bpm = float(payload["bpm"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Expected {'features': [...], 'bpm': number}")
+    mood = payload.get("mood")
+    if mood is not None and not isinstance(mood, str):
+        raise HTTPException(status_code=422, detail="mood must be a string")
+    return features, bpm, mood
+
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), func, *args)
+
+
+async def _run_in_thread(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+async def _run_vector(features, bpm, mood=None):
+    try:
+        return await _run_in_thread(_analyze_vector, features, bpm, mood)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ShardError as e:
+        # Drop the broken shards; the next request starts fresh ones
+        await _run_in_thread(close_engine)
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _run_vector_item(item):
+    return await _run_vector(*_parse_vector(item))
+
+
+async def _run_upload(path, func=_analyze_upload):
+    """Run a worker entry point func(path, level) in the pool, tracking load."""
+    with load_controller.track() as level:
+        result = await _run_in_pool(func, path, level)
+    if result is None:
+        raise HTTPException(status_code=422, detail="Failed to process audio")
+    return result
+
+
+@api.post("/api/analyze")
+async def analyze(request: Request):
+    """Analyze a raw audio upload or a JSON feature vector.
+
+    Audio is sent as the request body (any non-JSON content type); pass
+    ``?filename=song.mp3`` so the decoder can pick the right format.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        features, bpm, mood = _parse_vector(await _read_json(request))
+        return await _run_vector(features, bpm, mood)
+
+    path = await _spool_chunks(request.stream(), request.query_params.get("filename"))
+    return await _run_upload(path)
+
+
+@api.post("/api/analyze/batch")
+async def analyze_batch(request: Request):
+    """Analyze several files (multipart ``files`` fields) or feature vectors.
+
+    JSON batches look like ``{"items": [{"features": [...], "bpm": 120}, ...]}``.
+    Each item gets its own result; a failing item does not fail the batch.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        payload = await _read_json(request)
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            raise HTTPException(status_code=422, detail="Expected {'items': [...]}")
+        if len(items) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+        jobs = [_run_vector_item(item) for item in items]
+    else:
+        # The multipart parser writes every part to disk before any of the
+        # checks below run, so bound the request before parsing it.
+        length = request.headers.get("content-length")
+        if length is None:
+            raise HTTPException(status_code=411, detail="Content-Length required for file batches")
+        if not length.isdigit() or int(length) > MAX_BATCH_BYTES:
+            raise HTTPException(status_code=413, detail="Upload too large")
+        form = await request.form(max_files=MAX_BATCH_SIZE, max_fields=MAX_BATCH_SIZE)
+        uploads = [u for u in form.getlist("files") if hasattr(u, "read")]
+        if not uploads:
+            raise HTTPException(status_code=422, detail="No files uploaded")
+        if len(uploads) > MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} files per batch")
+        # Starlette already spools large multipart parts to disk; copy each
+        # one chunk by chunk into a path the worker process can open.
+        paths = []
+        try:
+            for upload in uploads:
+                paths.append(await _spool_chunks(_iter_upload(upload), upload.filename))
+        except BaseException:
+            for path in paths:
+                os.remove(path)
+            raise
+        finally:
+            await form.close()
+        jobs = [_run_upload(path) for path in paths]
+
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    return {
+        "results": [
+            {"error": r.detail} if isinstance(r, HTTPException)
+            else {"error": str(r)} if isinstance(r, Exception)
+            else r
+            for r in results
+        ]
+    }
+
+
+@api.post("/api/timeline")
+async def timeline(request: Request):
+    """Mood and BPM over time for a raw audio upload (see /api/analyze)."""
+    path = await _spool_chunks(request.stream(), request.query_params.get("filename"))
+    return await _run_upload(path, _timeline_upload)
+
+
+@api.post("/api/recommend")
+async def recommend(request: Request):
+    """Recommend tracks for a feature vector.
+
+    Body: ``{"features": [...], "bpm": 120, "mood": "calm"}``; ``mood`` is
+    optional and is predicted from the features when omitted.
+    """
+    features, bpm, mood = _parse_vector(await _read_json(request))
+    return await _run_vector(features, bpm, mood)
+
+
+@api.post("/api/playlist")
+async def playlist(request: Request):
+    """Generate a playlist following a mood schedule and a BPM ramp.
+
+    Body: ``{"moods": ["calm", "energetic"], "start_bpm": 90, "end_bpm": 128,
+    "length": 100, "seed_track_id": "track1.mp3"}``; only ``start_bpm`` is
+    required.
+    """
+    payload = await _read_json(request)
+    try:
+        moods = payload.get("moods") or [None]
+        start_bpm = float(payload["start_bpm"])
+        end_bpm = float(payload.get("end_bpm", start_bpm))
+        length = int(payload.get("length", 50))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Expected {'start_bpm': number, ...}")
+    if moods != [None] and not (isinstance(moods, list) and all(isinstance(m, str) for m in moods)):
+        raise HTTPException(status_code=422, detail="moods must be a list of strings")
+    if not 1 <= length <= 1000:
+        raise HTTPException(status_code=422, detail="length must be between 1 and 1000")
+    if not (start_bpm > 0 and end_bpm > 0):
+        raise HTTPException(status_code=422, detail="start_bpm and end_bpm must be positive")
+
+    try:
+        tracks = await _run_in_thread(
+            lambda: build_playlist(load_index(), moods, start_bpm, end_bpm, length, payload.get("seed_track_id"))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"tracks": tracks}
+
+
+@api.get("/api/tracks/{track_id}/similar")
+async def similar(track_id: str, k: int = 5):
+    """Tracks similar to a catalog track, served from precomputed neighbour lists."""
+    try:
+        # The first call (and the first after a rebuild) loads the .npz
+        results = await _run_in_thread(similar_tracks, track_id, max(1, k))
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Neighbour lists not built; run build_catalog.py")
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Unknown track: {track_id}")
+    return {"track_id": track_id, "recommendations": results}
+
+
+@api.get("/api/status")
+async def status():
+    """Current analysis level, in-flight uploads and latency average (seconds)."""
+    return load_controller.status()
+
+
+# Starlette's own errors (e.g. from the multipart parser) get the same shape
+@api.exception_handler(StarletteHTTPException)
+async def http_error(request, exc):
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+
+
+def create_app():
+    """Return the JSON API with the Gradio UI mounted at the root."""
+    from app import ui, premium_css, premium_theme
+    # Mounting does not go through ui.launch(), so pass the styling here too
+    return gr.mount_gradio_app(api, ui, path="/", css=premium_css, theme=premium_theme)
+
+
+if __name__ == "__main__":
+    uvicorn.run(create_app(), host="127.0.0.1", port=7860)
@@ -1,13 +1,12 @@
 import gradio as gr
-import joblib
-import numpy as np
 from feature_extraction import extract_features
-from matcher import recommend_tracks
+from query_engine import get_engine
 from database import log_query
+from analysis import classify, load_models
+from timeline import mood_timeline, format_timeline
 
 # Load models
-model = joblib.load("model/mood_model.pkl")
-encoder = joblib.load("model/label_encoder.pkl")
+load_models()
 
 def process(audio_path):
     """Process audio and return comprehensive analysis."""
@@ -34,16 +33,11 @@ def process(audio_path):
                 "icon": "❌"
             }
         
-        features = np.array(features).reshape(1, -1)
-        probs = model.predict_proba(features)[0]
-        mood_idx = np.argmax(probs)
-        confidence = float(probs[mood_idx])
+        mood_label, confidence, _ = classify(features)
         
-        if confidence < 0.55:
+        if mood_label == "uncertain":
             mood, color, icon = "Uncertain", "#9CA3AF", "❓"
-            mood_label = "uncertain"
         else:
-            mood_label = encoder.inverse_transform([mood_idx])[0]
             config = {
                 "happy": ("Happy", "#FBBF24", "😊"),
                 "calm": ("Calm", "#60A5FA", "😌"),
@@ -52,19 +46,15 @@ def process(audio_path):
             }
             mood, color, icon = config.get(mood_label, (mood_label.title(), "#6B7280", "🎵"))
         
+        results = []
         try:
-            results = recommend_tracks(
-                input_features=features.flatten(),
-                input_bpm=bpm,
-                input_mood=mood_label,
-                weight=0.5
-            )
-            tracks_str = "\n".join(f"• {t}" for t in results["track_id"].tolist()) if results is not None and len(results) > 0 else "No recommendations"
+            results = get_engine().search(features, bpm, mood_label)
+            tracks_str = "\n".join(f"• {t}" for t, _ in results) if results else "No recommendations"
         except:
             tracks_str = "Unable to load recommendations"
         
         try:
-            log_query(mood_label, bpm, results["track_id"].tolist() if 'results' in locals() else [])
+            log_query(mood_label, bpm, [t for t, _ in results])
         except:
             pass
         
@@ -384,8 +374,10 @@ body[data-theme='light'] { background: linear-gradient(135deg, #f8fafc 0%, #eef2
 
 """
 
+premium_theme = gr.themes.Soft()
+
 # Create UI
-with gr.Blocks(theme=gr.themes.Soft(), analytics_enabled=False) as ui:
+with gr.Blocks(theme=premium_theme, analytics_enabled=False) as ui:
     gr.HTML('<div class="header-logo">🎵 PLAYMOOD</div>')
     gr.HTML('<div class="header-tagline">Professional Audio Mood Analysis • Powered by AI</div>')
     
@@ -401,6 +393,7 @@ with gr.Blocks(theme=gr.themes.Soft(), analytics_enabled=False) as ui:
                 with gr.Row():
                     submit_btn = gr.Button("▶ Analyze", scale=2, variant="primary", elem_classes="btn-primary")
                     clear_btn = gr.Button("↻ Reset", scale=1, elem_classes="btn-secondary")
+                    timeline_btn = gr.Button("〰 Timeline", scale=1, elem_classes="btn-secondary")
                     export_btn = gr.Button("⬇ Export PNG", scale=1, elem_classes="export-btn")
         
         with gr.Column(scale=1.2):
@@ -426,6 +419,8 @@ with gr.Blocks(theme=gr.themes.Soft(), analytics_enabled=False) as ui:
                 
                 gr.HTML('<div class="result-label" style="margin-top: 16px;">Recommended Tracks</div>')
                 tracks_output = gr.Textbox(interactive=False, container=False, show_label=False, lines=4, placeholder="Recommendations will appear here...", elem_classes="result-value")
+                gr.HTML('<div class="result-label" style="margin-top: 16px;">Mood Timeline</div>')
+                timeline_output = gr.Textbox(interactive=False, container=False, show_label=False, lines=4, placeholder="Click Timeline to see mood over time...")
                 gr.HTML('<div id="lottie_mood" style="width:80px; height:80px; margin-top:8px"></div>')
                 mood_meta = gr.HTML('<div id="mood_meta" style="display:none"></div>')
     
@@ -446,9 +441,16 @@ with gr.Blocks(theme=gr.themes.Soft(), analytics_enabled=False) as ui:
         outputs=[mood_output, confidence_output, bpm_output, tracks_output, mood_badge, color_state, mood_meta]
     )
     
+    def handle_timeline(audio_path):
+        if audio_path is None:
+            return "Upload an audio file"
+        return format_timeline(mood_timeline(audio_path))
+    
+    timeline_btn.click(handle_timeline, inputs=audio_input, outputs=timeline_output)
+    
     clear_btn.click(
-        lambda: (None, "", "", "", '<div class="mood-badge" style="background: linear-gradient(135deg, #6B7280, #4B5563);">⏳ Waiting</div>', "#6B7280", '<div id="mood_meta"></div>'),
-        outputs=[audio_input, mood_output, confidence_output, bpm_output, tracks_output, mood_badge, color_state, mood_meta]
+        lambda: (None, "", "", "", "", '<div class="mood-badge" style="background: linear-gradient(135deg, #6B7280, #4B5563);">⏳ Waiting</div>', "#6B7280", '<div id="mood_meta"></div>'),
+        outputs=[audio_input, mood_output, confidence_output, bpm_output, tracks_output, timeline_output, mood_badge, color_state, mood_meta]
     )
 
     # Add supporting scripts (Lottie, html2canvas, visualizer wiring)
@@ -572,4 +574,5 @@ with gr.Blocks(theme=gr.themes.Soft(), analytics_enabled=False) as ui:
     </script>
     ''')
 
-ui.launch(server_name="127.0.0.1", server_port=7860, show_error=True, css=premium_css)
+if __name__ == "__main__":
+    ui.launch(server_name="127.0.0.1", server_port=7860, show_error=True, css=premium_css)
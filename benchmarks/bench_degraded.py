@@ -0,0 +1,110 @@
+"""Accuracy and speed of each degraded analysis level against the full path.
+
+Run from the repository root over a directory of real audio:
+
+    python -m benchmarks.bench_degraded catalog/audio
+
+For every level in degraded.LEVELS it reports mean extraction time and
+speedup, BPM agreement with beat_track (exact within 4%, and allowing
+half/double-tempo errors), cosine similarity of the feature vector to the
+full one, and, when the model and catalog are available, mood agreement,
+confidence drift and top-5 recommendation overlap. Use the table to set
+degraded.THRESHOLDS.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analysis import classify
+from degraded import LEVELS, extract_for_level
+from profile_extraction import list_audio
+from query_engine import get_engine
+
+
+def bpm_match(bpm, reference, tolerance=0.04, octave=False):
+    candidates = [reference, reference * 2, reference / 2] if octave else [reference]
+    return any(abs(bpm - c) <= tolerance * c for c in candidates)
+
+
+def cosine(a, b):
+    denom = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / denom) if denom else 0.0
+
+
+def analyze(path, level, with_model, with_catalog):
+    start = time.perf_counter()
+    features, bpm = extract_for_level(path, level)
+    elapsed = time.perf_counter() - start
+    if features is None:
+        return None
+
+    result = {"time": elapsed, "features": features, "bpm": bpm}
+    if with_model:
+        result["mood"], result["confidence"], _ = classify(features)
+        if with_catalog:
+            result["tracks"] = {t for t, _ in get_engine().search(features, bpm, result["mood"])}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--limit", type=int, help="only the first N files")
+    args = parser.parse_args()
+
+    files = list_audio(args.directory, args.limit)
+    if not files:
+        raise SystemExit(f"No audio files in {args.directory}")
+
+    with_model = with_catalog = True
+    try:
+        classify(np.zeros(30))
+    except (OSError, ValueError) as e:
+        print(f"Mood model unavailable ({e}); skipping mood metrics")
+        with_model = with_catalog = False
+    if with_model:
+        try:
+            get_engine()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Catalog unavailable ({e}); skipping recommendation overlap")
+            with_catalog = False
+
+    # Warm up lazy imports / numba so the first file's timing isn't skewed
+    for level in LEVELS:
+        extract_for_level(files[0], level)
+
+    results = {level: [] for level in LEVELS}
+    for path in files:
+        full = analyze(path, "full", with_model, with_catalog)
+        if full is None:
+            continue
+        results["full"].append((full, full))
+        for level in list(LEVELS)[1:]:
+            result = analyze(path, level, with_model, with_catalog)
+            if result is not None:
+                results[level].append((full, result))
+
+    full_time = np.mean([r["time"] for _, r in results["full"]])
+    print(f"\n{len(results['full'])} files")
+    header = f"{'level':<10}{'time s':>8}{'speedup':>9}{'bpm±4%':>8}{'±octave':>9}{'feat cos':>10}"
+    if with_model:
+        header += f"{'mood agr':>10}{'Δconf':>8}"
+    if with_catalog:
+        header += f"{'top5 ovl':>10}"
+    print(header)
+
+    for level, pairs in results.items():
+        if not pairs:
+            continue
+        t = np.mean([r["time"] for _, r in pairs])
+        line = (f"{level:<10}{t:>8.2f}{full_time / t:>8.1f}x"
+                f"{np.mean([bpm_match(r['bpm'], f['bpm']) for f, r in pairs]):>8.0%}"
+                f"{np.mean([bpm_match(r['bpm'], f['bpm'], octave=True) for f, r in pairs]):>9.0%}"
+                f"{np.mean([cosine(r['features'], f['features']) for f, r in pairs]):>10.4f}")
+        if with_model:
+            line += (f"{np.mean([r['mood'] == f['mood'] for f, r in pairs]):>10.0%}"
+                     f"{np.mean([abs(r['confidence'] - f['confidence']) for f, r in pairs]):>8.3f}")
+        if with_catalog:
+            line += f"{np.mean([len(r['tracks'] & f['tracks']) / max(1, len(f['tracks'])) for f, r in pairs]):>10.0%}"
+        print(line)
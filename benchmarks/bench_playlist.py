@@ -0,0 +1,50 @@
+"""Playlist generation speed on a synthetic catalog.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_playlist --tracks 1000000 --length 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from catalog_index import CatalogIndex
+from playlist import build_playlist
+
+MOODS = ["happy", "calm", "energetic", "sad"]
+
+
+def synthetic_index(n_tracks, n_features=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return CatalogIndex(
+        track_ids=np.array([f"track{i}" for i in range(n_tracks)]),
+        moods=rng.choice(MOODS, n_tracks),
+        bpm=rng.uniform(60, 180, n_tracks),
+        features=rng.standard_normal((n_tracks, n_features), dtype=np.float32)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--length", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = synthetic_index(args.tracks)
+    print(f"Index build: {time.perf_counter() - start:.2f}s for {len(index):,} tracks")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        playlist = build_playlist(index, ["calm", "energetic"], 90, 128, args.length)
+        timings.append(time.perf_counter() - start)
+
+    bpm = np.array([t["bpm"] for t in playlist])
+    target = np.array([t["target_bpm"] for t in playlist])
+    print(f"Playlist of {len(playlist)} tracks: best {min(timings) * 1000:.1f} ms, "
+          f"median {np.median(timings) * 1000:.1f} ms")
+    print(f"Mean |bpm - target|: {np.mean(np.abs(bpm - target)):.2f} BPM, "
+          f"max step: {np.max(np.abs(np.diff(bpm))):.2f} BPM")
@@ -0,0 +1,100 @@
+"""Per-query allocations and throughput: recommend_tracks vs QueryEngine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_query --tracks 100000 --queries 200
+
+"Transient MB" is the peak memory a query allocates on top of what was
+already live (tracemalloc), i.e. the garbage it creates; "gc/1k" counts
+generation-0 collections triggered per thousand queries.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from catalog_index import CatalogIndex
+from matcher import recommend_tracks
+from query_engine import QueryEngine
+
+MOODS = ["happy", "calm", "energetic", "sad"]
+
+
+def synthetic_catalog(n_tracks, n_features=30, seed=0):
+    rng = np.random.default_rng(seed)
+    catalog = pd.DataFrame(
+        rng.standard_normal((n_tracks, n_features)),
+        columns=[f"f{i}" for i in range(n_features)]
+    )
+    catalog.insert(0, "bpm", rng.uniform(60, 180, n_tracks))
+    catalog.insert(0, "mood", rng.choice(MOODS, n_tracks))
+    catalog.insert(0, "track_id", [f"track{i}" for i in range(n_tracks)])
+    return catalog
+
+
+def synthetic_queries(n_queries, n_features=30, seed=1):
+    rng = np.random.default_rng(seed)
+    return [
+        (rng.standard_normal(n_features), float(rng.uniform(60, 180)), str(rng.choice(MOODS)))
+        for _ in range(n_queries)
+    ]
+
+
+def measure(search, queries):
+    """Mean latency, mean transient bytes and gen-0 collections per 1k queries."""
+    for q in queries[:5]:
+        search(*q)
+
+    transient = []
+    tracemalloc.start()
+    for q in queries:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        search(*q)
+        transient.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    collections = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    for q in queries:
+        search(*q)
+    elapsed = time.perf_counter() - start
+    collections = gc.get_stats()[0]["collections"] - collections
+
+    return elapsed / len(queries), float(np.mean(transient)), collections * 1000 / len(queries)
+
+
+def throughput(search, queries, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda q: search(*q), queries))
+    return len(queries) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.tracks)
+    queries = synthetic_queries(args.queries)
+    engine = QueryEngine(CatalogIndex.from_frame(catalog))
+
+    def before(features, bpm, mood):
+        return recommend_tracks(features, bpm, mood, catalog=catalog)
+
+    print(f"{args.tracks:,} tracks, {args.queries} queries")
+    print(f"{'path':<18}{'latency ms':>12}{'transient MB':>14}{'gc/1k':>8}")
+    for name, search in (("recommend_tracks", before), ("QueryEngine", engine.search)):
+        latency, transient, collections = measure(search, queries)
+        print(f"{name:<18}{latency * 1e3:>12.2f}{transient / 2 ** 20:>14.2f}{collections:>8.1f}")
+
+    print(f"\n{'threads':<18}{'QueryEngine qps':>16}")
+    for threads in args.threads:
+        print(f"{threads:<18}{throughput(engine.search, queries * 5, threads):>16.0f}")
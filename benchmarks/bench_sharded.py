@@ -0,0 +1,56 @@
+"""Latency and throughput of ShardedSearch as the shard count grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sharded --tracks 1000000 --shards 1 2 4 8
+
+Latency is one query at a time (a full fan-out/merge round trip);
+throughput is concurrent .search() calls from --threads threads, the way
+the API calls it. Scaling tops out at the number of CPU cores.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_query import synthetic_catalog, synthetic_queries, throughput
+from catalog_index import CatalogIndex
+from query_engine import QueryEngine
+from sharded_search import ShardedSearch
+
+
+def run(search, queries, threads):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        search(*q)
+        latencies.append(time.perf_counter() - start)
+
+    qps = throughput(search, queries, threads)
+    return np.median(latencies), np.percentile(latencies, 99), qps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.tracks)
+    queries = synthetic_queries(args.queries)
+    print(f"{args.tracks:,} tracks, {args.queries} queries, {args.threads} threads, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'shards':<14}{'p50 ms':>10}{'p99 ms':>10}{'qps':>12}")
+
+    engine = QueryEngine(CatalogIndex.from_frame(catalog))
+    p50, p99, qps = run(engine.search, queries, args.threads)
+    print(f"{'in-process':<14}{p50 * 1e3:>10.2f}{p99 * 1e3:>10.2f}{qps:>12.0f}")
+
+    for n in args.shards:
+        with ShardedSearch(catalog, n) as sharded:
+            sharded.search_batch(queries[:10])  # warm up
+            p50, p99, qps = run(sharded.search, queries, args.threads)
+        print(f"{n:<14}{p50 * 1e3:>10.2f}{p99 * 1e3:>10.2f}{qps:>12.0f}")
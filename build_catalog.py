@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 from feature_extraction import extract_features
+from fingerprint import fingerprint, FingerprintIndex, classify_match
+from neighbors import build_neighbors, NEIGHBORS_PATH
 
 AUDIO_DIR = "catalog/audio"
 
@@ -13,14 +15,29 @@ mood_map = {
 }
 
 data = []
+rows_by_id = {}
+fp_index = FingerprintIndex()
 
 print("Extracting features from audio files...")
 
-for file in os.listdir(AUDIO_DIR):
+for file in sorted(os.listdir(AUDIO_DIR)):
     if file.endswith((".wav", ".mp3")):
         path = os.path.join(AUDIO_DIR, file)
         print(f"  Processing {file}...", end=" ")
         
+        # Fingerprint first: duplicates reuse the original's features
+        # instead of paying for a full extraction. Near duplicates (edits,
+        # long excerpts) are analyzed themselves and only linked.
+        hashes, times = fingerprint(path)
+        match_id, match_score = fp_index.match(hashes, times)
+        match_kind = classify_match(match_score)
+        if match_kind == "duplicate":
+            original = rows_by_id[match_id]
+            row = dict(original, track_id=file, mood=mood_map.get(file, original["mood"]))
+            data.append(row)
+            print(f"DUPLICATE of {match_id} ({match_score:.0%}), linked")
+            continue
+        
         features, bpm = extract_features(path)
         
         if features is None:
@@ -29,6 +46,7 @@ for file in os.listdir(AUDIO_DIR):
         
         row = {
             "track_id": file,
+            "canonical_id": rows_by_id[match_id]["canonical_id"] if match_kind else file,
             "mood": mood_map.get(file, "unknown"),
             "bpm": bpm
         }
@@ -38,14 +56,24 @@ for file in os.listdir(AUDIO_DIR):
             row[f"f{i}"] = float(value)
         
         data.append(row)
+        if match_kind:
+            print(f"NEAR_DUPLICATE of {match_id} ({match_score:.0%}), linked ✓ ({len(features)} features)")
+            continue
+        rows_by_id[file] = row
+        if hashes is not None:
+            fp_index.add(file, hashes, times)
         print(f"✓ ({len(features)} features)")
 
 # Create DataFrame and save
 df = pd.DataFrame(data)
 print(f"\nCatalog summary:")
 print(f"  Total tracks: {len(df)}")
+print(f"  Unique recordings: {df['canonical_id'].nunique()}")
 print(f"  Feature columns: {len([c for c in df.columns if c.startswith('f')])}")
 print(f"  Data shape: {df.shape}")
 
 df.to_csv("catalog/catalog_features.csv", index=False)
 print("✓ Catalog saved to catalog/catalog_features.csv")
+
+neighbors, _ = build_neighbors(df)
+print(f"✓ Top-{neighbors.shape[1]} neighbours saved to {NEIGHBORS_PATH}")
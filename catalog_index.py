@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+CATALOG_PATH = "catalog/catalog_features.csv"
+
+_index = None
+
+
+class CatalogIndex:
+    """In-memory catalog laid out for range scans.
+
+    Rows are sorted by (mood, bpm) so that "tracks of mood m within a BPM
+    window" is one contiguous slice found with two binary searches, and
+    features are L2-normalized float32 so cosine similarity is a dot product.
+    """
+
+    def __init__(self, track_ids, moods, bpm, features, canonical_ids=None):
+        moods = np.asarray(moods).astype(str)
+        bpm = np.asarray(bpm, dtype=np.float64)
+        order = np.lexsort((bpm, moods))
+
+        features = np.asarray(features, dtype=np.float32)[order]
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        self.track_ids = np.asarray(track_ids).astype(str)[order]
+        self.moods = moods[order]
+        self.bpm = bpm[order]
+        self.features = np.ascontiguousarray(features / norms)
+
+        if canonical_ids is None:
+            self.groups = np.arange(len(order))
+        else:
+            self.groups = pd.factorize(np.asarray(canonical_ids).astype(str)[order])[0]
+
+        # mood -> (start, stop) row range; rows inside are sorted by bpm
+        names, starts, counts = np.unique(self.moods, return_index=True, return_counts=True)
+        self.mood_ranges = {
+            str(m): (int(s), int(s + c)) for m, s, c in zip(names, starts, counts)
+        }
+        # Whole-catalog bpm order, for windows that ignore mood
+        self.bpm_order = np.argsort(self.bpm, kind="stable")
+        self.bpm_sorted = self.bpm[self.bpm_order]
+        self.rows = {t: i for i, t in enumerate(self.track_ids.tolist())}
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    @classmethod
+    def from_frame(cls, catalog):
+        catalog = catalog.copy()
+        catalog["bpm"] = pd.to_numeric(catalog["bpm"], errors="coerce")
+        catalog = catalog.dropna(subset=["bpm"])
+        feature_columns = [col for col in catalog.columns if col.startswith("f")]
+        return cls(
+            catalog["track_id"].values,
+            catalog["mood"].values,
+            catalog["bpm"].values,
+            catalog[feature_columns].values,
+            catalog["canonical_id"].values if "canonical_id" in catalog.columns else None
+        )
+
+    @classmethod
+    def from_csv(cls, path=CATALOG_PATH):
+        return cls.from_frame(pd.read_csv(path))
+
+    def bpm_window(self, low, high, mood=None):
+        """Rows with low <= bpm <= high (and the given mood, if any).
+
+        Returns a slice when mood is given (rows are contiguous), otherwise
+        an index array into the catalog.
+        """
+        if mood is not None:
+            start, stop = self.mood_ranges.get(mood, (0, 0))
+            bpm = self.bpm[start:stop]
+            lo = start + np.searchsorted(bpm, low, side="left")
+            hi = start + np.searchsorted(bpm, high, side="right")
+            return slice(lo, hi)
+
+        lo = np.searchsorted(self.bpm_sorted, low, side="left")
+        hi = np.searchsorted(self.bpm_sorted, high, side="right")
+        return self.bpm_order[lo:hi]
+
+
+def load_index(path=CATALOG_PATH):
+    """Load the catalog index once per process."""
+    global _index
+    if _index is None:
+        _index = CatalogIndex.from_csv(path)
+    return _index
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from feature_extraction import extract_features, extract_features_fast
+
+# Cheapest last. "reduced" keeps the model's sample rate so MFCCs stay
+# comparable; "minimal" also halves the sample rate.
+LEVELS = {
+    "full": {},
+    "reduced": {"duration": 30, "sr": 22050},
+    "minimal": {"duration": 15, "sr": 11025},
+}
+LEVEL_ORDER = list(LEVELS)
+
+# Switch to a level once the analyses already in flight or the latency
+# average reach its thresholds. Measure the accuracy cost of each level on
+# your own audio with benchmarks/bench_degraded.py before tuning these.
+_CPUS = os.cpu_count() or 1
+THRESHOLDS = {
+    "reduced": {"in_flight": 2 * _CPUS, "latency": 5.0},
+    "minimal": {"in_flight": 6 * _CPUS, "latency": 15.0},
+}
+# Step back to a more expensive level only once load falls below this
+# fraction of the current level's thresholds, so the level doesn't flap.
+RECOVERY_FACTOR = 0.5
+LATENCY_ALPHA = 0.2
+
+
+def extract_for_level(audio_path, level="full", profiler=None):
+    """Run the extractor for an analysis level; same return as extract_features."""
+    if level == "full":
+        return extract_features(audio_path, profiler=profiler)
+    return extract_features_fast(audio_path, profiler=profiler, **LEVELS[level])
+
+
+class LoadController:
+    """Picks an analysis level from queue depth and recent latency.
+
+    Use track() around each analysis: it counts the request as in flight,
+    yields the level to use, and feeds the elapsed time into an
+    exponentially weighted latency average.
+    """
+
+    def __init__(self, thresholds=THRESHOLDS, recovery=RECOVERY_FACTOR, alpha=LATENCY_ALPHA):
+        self.thresholds = thresholds
+        self.recovery = recovery
+        self.alpha = alpha
+        self.in_flight = 0
+        self.latency = 0.0
+        self.level = "full"
+        self._lock = threading.Lock()
+
+    def _over(self, level, factor=1.0):
+        limits = self.thresholds[level]
+        return (self.in_flight >= limits["in_flight"] * factor
+                or self.latency >= limits["latency"] * factor)
+
+    def _choose(self):
+        # Degrade straight to the cheapest level whose thresholds are hit
+        for level in reversed(LEVEL_ORDER[1:]):
+            if LEVEL_ORDER.index(level) > LEVEL_ORDER.index(self.level) and self._over(level):
+                self.level = level
+                return
+        # Recover one step at a time, with hysteresis
+        if self.level != "full" and not self._over(self.level, self.recovery):
+            self.level = LEVEL_ORDER[LEVEL_ORDER.index(self.level) - 1]
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            # Decide on the load already queued ahead of this request
+            self._choose()
+            self.in_flight += 1
+            level = self.level
+        start = time.perf_counter()
+        try:
+            yield level
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.latency += self.alpha * (elapsed - self.latency)
+
+    def status(self):
+        with self._lock:
+            return {"level": self.level, "in_flight": self.in_flight, "latency": self.latency}
@@ -1,31 +1,45 @@
 import librosa
 import numpy as np
+from contextlib import nullcontext
 
-def extract_features(audio_path):
-    """Extract exactly 30 audio features from an audio file."""
+
+def _stage(profiler, name):
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def extract_features(audio_path, profiler=None):
+    """Extract exactly 30 audio features from an audio file.
+
+    Pass a profile_extraction.StageProfiler as profiler to time each stage.
+    """
     try:
         # Load audio
-        y, sr = librosa.load(audio_path, duration=60)
+        with _stage(profiler, "librosa.load"):
+            y, sr = librosa.load(audio_path, duration=60)
         
         # MFCC features (13 mean + 13 std = 26 features)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        mfcc_mean = mfcc.mean(axis=1)  # 13 features
-        mfcc_std = mfcc.std(axis=1)    # 13 features
+        with _stage(profiler, "mfcc"):
+            mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+            mfcc_mean = mfcc.mean(axis=1)  # 13 features
+            mfcc_std = mfcc.std(axis=1)    # 13 features
         
         # Tempo (1 feature)
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+        with _stage(profiler, "beat.beat_track"):
+            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
         if isinstance(tempo, np.ndarray):
             tempo = float(tempo[0]) if len(tempo) > 0 else 0.0
         tempo = float(tempo)
         
         # RMS Energy (2 features: mean + std)
-        rms = librosa.feature.rms(y=y)[0]
-        rms_mean = float(np.mean(rms))
-        rms_std = float(np.std(rms))
+        with _stage(profiler, "rms"):
+            rms = librosa.feature.rms(y=y)[0]
+            rms_mean = float(np.mean(rms))
+            rms_std = float(np.std(rms))
         
         # Zero Crossing Rate (1 feature)
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
-        zcr_mean = float(np.mean(zcr))
+        with _stage(profiler, "zero_crossing_rate"):
+            zcr = librosa.feature.zero_crossing_rate(y)[0]
+            zcr_mean = float(np.mean(zcr))
         
         # Combine all features into a single vector (30 features total)
         feature_vector = np.concatenate([
@@ -42,3 +56,67 @@ def extract_features(audio_path):
     except Exception as e:
         print(f"Error extracting features: {e}")
         return None, None
+
+
+def estimate_tempo_fast(y, sr, hop_length=512, min_bpm=60, max_bpm=200, start_bpm=120):
+    """Tempo from the autocorrelation of the onset envelope.
+
+    A single global autocorrelation weighted by the same log-normal prior
+    librosa uses, instead of beat_track's dynamic-programming beat search.
+    """
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    max_lag = int(np.ceil(60.0 * sr / (hop_length * min_bpm)))
+    ac = librosa.autocorrelate(onset_env - onset_env.mean(), max_size=max_lag + 1)
+
+    lags = np.arange(1, len(ac))
+    bpms = 60.0 * sr / (hop_length * lags)
+    prior = np.exp(-0.5 * (np.log2(bpms) - np.log2(start_bpm)) ** 2)
+    valid = (bpms >= min_bpm) & (bpms <= max_bpm)
+    if not valid.any():
+        return 0.0
+    weighted = np.where(valid, ac[1:] * prior, -np.inf)
+    return float(bpms[np.argmax(weighted)])
+
+
+def extract_features_fast(audio_path, duration=20, sr=22050, profiler=None):
+    """Cheaper variant of extract_features with the same 30-feature layout.
+
+    Analyzes a shorter excerpt, optionally at a lower sample rate, and
+    replaces beat tracking with estimate_tempo_fast. Features drift from
+    the full path; see benchmarks/bench_degraded.py for how much.
+    """
+    try:
+        with _stage(profiler, "librosa.load"):
+            y, sr = librosa.load(audio_path, sr=sr, duration=duration)
+        
+        with _stage(profiler, "mfcc"):
+            mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+            mfcc_mean = mfcc.mean(axis=1)
+            mfcc_std = mfcc.std(axis=1)
+        
+        with _stage(profiler, "tempo_fast"):
+            tempo = estimate_tempo_fast(y, sr)
+        
+        with _stage(profiler, "rms"):
+            rms = librosa.feature.rms(y=y)[0]
+            rms_mean = float(np.mean(rms))
+            rms_std = float(np.std(rms))
+        
+        with _stage(profiler, "zero_crossing_rate"):
+            zcr = librosa.feature.zero_crossing_rate(y)[0]
+            zcr_mean = float(np.mean(zcr))
+        
+        feature_vector = np.concatenate([
+            mfcc_mean,
+            mfcc_std,
+            [tempo],
+            [rms_mean],
+            [rms_std],
+            [zcr_mean]
+        ])
+        
+        return feature_vector, tempo
+    
+    except Exception as e:
+        print(f"Error extracting features: {e}")
+        return None, None
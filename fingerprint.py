@@ -0,0 +1,114 @@
+import librosa
+import numpy as np
+from scipy.ndimage import maximum_filter
+
+# Fingerprints only need a coarse spectrogram, so decode at a low sample
+# rate; this is a fraction of the cost of extract_features. The whole track
+# is fingerprinted (FP_DURATION=None) so that two files sharing only an
+# intro are not taken for the same recording.
+FP_SR = 11025
+FP_DURATION = None
+FP_N_FFT = 1024
+FP_HOP = 512
+
+PEAK_NEIGHBORHOOD = (15, 11)  # (frequency bins, frames)
+PEAK_FLOOR_DB = -45
+FAN_OUT = 5
+MAX_DT = 63
+
+# A duplicate reuses the original's features, so it must cover nearly all of
+# both tracks; anything shorter or noisier is at most a near duplicate.
+DUPLICATE_THRESHOLD = 0.8
+NEAR_DUPLICATE_THRESHOLD = 0.15
+MIN_ALIGNED_HASHES = 20
+
+
+def fingerprint(audio_path, duration=FP_DURATION):
+    """Return (hashes, times) landmark fingerprints for an audio file.
+
+    Spectral peaks are paired with the next FAN_OUT peaks in time; each pair
+    is packed into one integer (f1, f2, dt) so matching is a dict lookup.
+    Returns (None, None) if the file cannot be decoded.
+    """
+    try:
+        y, sr = librosa.load(audio_path, sr=FP_SR, duration=duration)
+        S = np.abs(librosa.stft(y, n_fft=FP_N_FFT, hop_length=FP_HOP))
+        S = librosa.amplitude_to_db(S, ref=np.max)
+
+        peaks = (S == maximum_filter(S, size=PEAK_NEIGHBORHOOD)) & (S > PEAK_FLOOR_DB)
+        freqs, times = np.nonzero(peaks)
+        order = np.argsort(times, kind="stable")
+        freqs, times = freqs[order], times[order]
+
+        hashes, anchors = [], []
+        for j in range(1, FAN_OUT + 1):
+            f1, f2 = freqs[:-j], freqs[j:]
+            t1, dt = times[:-j], times[j:] - times[:-j]
+            keep = (dt > 0) & (dt <= MAX_DT)
+            hashes.append((f1[keep] << 16) | (f2[keep] << 6) | dt[keep])
+            anchors.append(t1[keep])
+
+        return np.concatenate(hashes).astype(np.int64), np.concatenate(anchors).astype(np.int64)
+
+    except Exception as e:
+        print(f"Error fingerprinting audio: {e}")
+        return None, None
+
+
+class FingerprintIndex:
+    """Inverted index from landmark hash to (track, time) postings."""
+
+    def __init__(self):
+        self.track_ids = []
+        self.hash_counts = []
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    def add(self, track_id, hashes, times):
+        track_idx = len(self.track_ids)
+        self.track_ids.append(track_id)
+        self.hash_counts.append(len(hashes))
+        for h, t in zip(hashes.tolist(), times.tolist()):
+            self.postings.setdefault(h, []).append((track_idx, t))
+
+    def match(self, hashes, times):
+        """Return (track_id, score) of the best match, or (None, 0.0).
+
+        The score is the fraction of hashes that hit one track at a single
+        consistent time offset, relative to the longer of the two
+        fingerprints, so it is high only when the match covers both tracks:
+        a re-encode of the same audio scores high, an excerpt or a track
+        that merely shares its opening scores in proportion to the overlap,
+        and unrelated tracks sharing a few hashes by chance score near 0.
+        """
+        if hashes is None or len(hashes) == 0:
+            return None, 0.0
+
+        hit_tracks, hit_offsets = [], []
+        for h, t in zip(hashes.tolist(), times.tolist()):
+            for track_idx, ref_t in self.postings.get(h, ()):
+                hit_tracks.append(track_idx)
+                hit_offsets.append(ref_t - t)
+        if not hit_tracks:
+            return None, 0.0
+
+        pairs = np.stack([np.array(hit_tracks), np.array(hit_offsets)], axis=1)
+        uniq, counts = np.unique(pairs, axis=0, return_counts=True)
+        best = int(np.argmax(counts))
+        if counts[best] < MIN_ALIGNED_HASHES:
+            return None, 0.0
+
+        track_idx = int(uniq[best, 0])
+        total = max(len(hashes), self.hash_counts[track_idx])
+        return self.track_ids[track_idx], min(1.0, float(counts[best]) / total)
+
+
+def classify_match(score):
+    """Map a match score to 'duplicate', 'near_duplicate' or None."""
+    if score >= DUPLICATE_THRESHOLD:
+        return "duplicate"
+    if score >= NEAR_DUPLICATE_THRESHOLD:
+        return "near_duplicate"
+    return None
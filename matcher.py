@@ -2,8 +2,11 @@ import pandas as pd
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
-def recommend_tracks(input_features, input_bpm, input_mood, weight=0.5):
-    catalog = pd.read_csv("catalog/catalog_features.csv")
+def recommend_tracks(input_features, input_bpm, input_mood, weight=0.5, catalog=None):
+    if catalog is None:
+        catalog = pd.read_csv("catalog/catalog_features.csv")
+    else:
+        catalog = catalog.copy()
 
     # Ensure BPM is numeric
     catalog["bpm"] = pd.to_numeric(catalog["bpm"], errors="coerce")
@@ -48,7 +51,12 @@ def recommend_tracks(input_features, input_bpm, input_mood, weight=0.5):
 
     candidates = candidates.copy()
     candidates["score"] = similarities
+    candidates = candidates.sort_values("score", ascending=False)
 
-    return candidates.sort_values("score", ascending=False).head(5)[
+    # Collapse duplicate recordings linked by build_catalog's fingerprinting
+    if "canonical_id" in candidates.columns:
+        candidates = candidates.drop_duplicates(subset="canonical_id")
+
+    return candidates.head(5)[
         ["track_id", "score"]
     ]
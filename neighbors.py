@@ -0,0 +1,168 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+CATALOG_PATH = "catalog/catalog_features.csv"
+NEIGHBORS_PATH = "catalog/catalog_neighbors.npz"
+DEFAULT_TOP_N = 50
+DEFAULT_BLOCK_SIZE = 2048
+
+_index = None
+
+
+def _normalize(features):
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return features / norms
+
+
+def compute_neighbors(features, top_n=DEFAULT_TOP_N, block_size=DEFAULT_BLOCK_SIZE, groups=None):
+    """Return (indices, scores) of the top_n cosine neighbours of every row.
+
+    The similarity matrix is never materialized: rows are processed in
+    blocks of block_size against column blocks of the same size, keeping a
+    running top_n per row, so peak memory is O(block_size * (block_size + top_n)).
+    With groups (e.g. canonical_id codes for duplicate recordings), a row's
+    own group is excluded and each other group appears at most once, by its
+    best-scoring member. A row is never its own neighbour. Rows short of
+    top_n valid neighbours are padded with index -1.
+    """
+    X = _normalize(features)
+    n = len(X)
+    k = max(0, min(top_n, n - 1))
+
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    # Each group has at most max_group members, so the best k * max_group
+    # entries of a row always hold its k best groups; dedupe only those.
+    # With no duplicates at all the diagonal mask already does the job.
+    if groups is not None:
+        max_group = int(np.bincount(groups).max())
+        if max_group == 1:
+            groups = None
+        shortlist = k * max_group
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        best_scores = np.full((stop - start, k), -np.inf, dtype=np.float32)
+        best_idx = np.full((stop - start, k), -1, dtype=np.int32)
+
+        for cstart in range(0, n, block_size):
+            cstop = min(cstart + block_size, n)
+            sims = X[start:stop] @ X[cstart:cstop].T
+
+            # Mask self-similarity where the row and column blocks overlap
+            lo, hi = max(start, cstart), min(stop, cstop)
+            if lo < hi:
+                diag = np.arange(lo, hi)
+                sims[diag - start, diag - cstart] = -np.inf
+            if groups is not None:
+                sims[groups[start:stop, None] == groups[None, cstart:cstop]] = -np.inf
+
+            merged_scores = np.concatenate([best_scores, sims], axis=1)
+            merged_idx = np.concatenate([
+                best_idx,
+                np.broadcast_to(np.arange(cstart, cstop, dtype=np.int32), sims.shape)
+            ], axis=1)
+
+            if groups is not None:
+                if shortlist < merged_scores.shape[1]:
+                    top = np.argpartition(-merged_scores, shortlist - 1, axis=1)[:, :shortlist]
+                    merged_scores = np.take_along_axis(merged_scores, top, axis=1)
+                    merged_idx = np.take_along_axis(merged_idx, top, axis=1)
+
+                # Keep only the best-scoring member of each group: sort by
+                # (group, -score) and drop every entry after the first.
+                merged_groups = np.where(merged_idx >= 0, groups[merged_idx], -1)
+                order = np.lexsort((-merged_scores, merged_groups), axis=-1)
+                sorted_groups = np.take_along_axis(merged_groups, order, axis=1)
+                repeat = np.zeros_like(order, dtype=bool)
+                repeat[:, 1:] = sorted_groups[:, 1:] == sorted_groups[:, :-1]
+                np.put_along_axis(merged_scores, order, np.where(
+                    repeat, -np.inf, np.take_along_axis(merged_scores, order, axis=1)
+                ), axis=1)
+
+            top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            best_idx = np.take_along_axis(merged_idx, top, axis=1)
+
+        best_idx[np.isneginf(best_scores)] = -1
+        order = np.argsort(-best_scores, axis=1)
+        scores[start:stop] = np.take_along_axis(best_scores, order, axis=1)
+        neighbors[start:stop] = np.take_along_axis(best_idx, order, axis=1)
+
+    return neighbors, scores
+
+
+def build_neighbors(catalog, top_n=DEFAULT_TOP_N, block_size=DEFAULT_BLOCK_SIZE, path=NEIGHBORS_PATH):
+    """Compute and save neighbour lists for a catalog DataFrame."""
+    feature_columns = [col for col in catalog.columns if col.startswith("f")]
+    groups = None
+    if "canonical_id" in catalog.columns:
+        groups = pd.factorize(catalog["canonical_id"])[0]
+    neighbors, scores = compute_neighbors(catalog[feature_columns].values, top_n, block_size, groups)
+    # Write next to the target and rename, so a running server never reads
+    # a half-written file when it picks up the rebuild
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        track_ids=catalog["track_id"].to_numpy(dtype=str),
+        neighbors=neighbors,
+        scores=scores
+    )
+    os.replace(tmp_path, path)
+    return neighbors, scores
+
+
+def load_neighbors(path=NEIGHBORS_PATH):
+    """Load precomputed neighbour lists, reloading when the file is rebuilt."""
+    global _index
+    mtime = os.path.getmtime(path)
+    if _index is None or _index["path"] != path or _index["mtime"] != mtime:
+        with np.load(path) as data:
+            track_ids = data["track_ids"]
+            neighbors, scores = data["neighbors"], data["scores"]
+        _index = {
+            "path": path,
+            "mtime": mtime,
+            "track_ids": track_ids,
+            "rows": {track_id: row for row, track_id in enumerate(track_ids.tolist())},
+            "neighbors": neighbors,
+            "scores": scores
+        }
+    return _index
+
+
+def similar_tracks(track_id, k=5, path=NEIGHBORS_PATH):
+    """Return the k most similar catalog tracks to track_id.
+
+    Pure lookup: no audio decoding or similarity computation. Returns None
+    when track_id is not in the catalog.
+    """
+    index = load_neighbors(path)
+    row = index["rows"].get(track_id)
+    if row is None:
+        return None
+
+    k = min(k, index["neighbors"].shape[1])
+    return [
+        {"track_id": str(index["track_ids"][i]), "score": float(s)}
+        for i, s in zip(index["neighbors"][row, :k], index["scores"][row, :k])
+        if i >= 0
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute catalog neighbour lists")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    catalog = pd.read_csv(CATALOG_PATH)
+    neighbors, _ = build_neighbors(catalog, args.top_n, args.block_size)
+    print(f"✓ {neighbors.shape[1]} neighbours for {len(catalog)} tracks saved to {NEIGHBORS_PATH}")
@@ -0,0 +1,140 @@
+import argparse
+import numpy as np
+from catalog_index import load_index
+
+BPM_TOLERANCE = 0.04
+MAX_CANDIDATES = 2048
+BPM_WEIGHT = 2.0
+WIDEN_STEPS = 3
+
+
+def bpm_trajectory(start_bpm, end_bpm, length):
+    """Target BPM for each playlist position (linear ramp)."""
+    return np.linspace(start_bpm, end_bpm, length)
+
+
+def mood_schedule(moods, length):
+    """Split the playlist evenly across the requested moods, in order."""
+    if isinstance(moods, str):
+        moods = [moods]
+    return [moods[i * len(moods) // length] for i in range(length)]
+
+
+def _closest(rows_bpm, target, size=MAX_CANDIDATES):
+    """Bounds of the `size` entries of bpm-sorted rows nearest target."""
+    n = len(rows_bpm)
+    if n <= size:
+        return 0, n
+    center = int(np.searchsorted(rows_bpm, target))
+    lo = min(max(0, center - size // 2), n - size)
+    return lo, lo + size
+
+
+def _candidates(index, target, mood, tolerance, used_groups, n_used):
+    """Rows near the target BPM as (span, keep).
+
+    span is the slice (or index array) of rows to score; keep holds the
+    positions in it of the unused rows, capped at the MAX_CANDIDATES
+    closest by BPM. Used tracks are dropped before the cap, so a crowded
+    window still offers tracks that can be picked and widening reaches new
+    ones; only the n_used rows nearest beyond the cap need to be looked at
+    for that. Scoring the whole span keeps contiguous rows a cheap view.
+    """
+    window = index.bpm_window(target * (1 - tolerance), target * (1 + tolerance), mood)
+    lo, hi = _closest(index.bpm[window], target, MAX_CANDIDATES + n_used)
+    if isinstance(window, slice):
+        span = slice(window.start + lo, window.start + hi)
+    else:
+        span = window[lo:hi]
+    keep = np.flatnonzero(~used_groups[index.groups[span]])
+    lo, hi = _closest(index.bpm[span][keep], target)
+    return span, keep[lo:hi]
+
+
+def _next_track(index, current, target, mood, used_groups, n_used, tolerance, bpm_weight):
+    """Best unused track for one playlist slot, or None.
+
+    Tries the requested mood first, widening the BPM window a few times,
+    then falls back to any mood.
+    """
+    for candidate_mood in (mood, None):
+        for step in range(WIDEN_STEPS):
+            span, keep = _candidates(index, target, candidate_mood, tolerance * 2 ** step, used_groups, n_used)
+            if len(keep) == 0:
+                continue
+
+            scores = -bpm_weight * np.abs(index.bpm[span] - target) / target
+            if current is not None:
+                scores += index.features[span] @ index.features[current]
+            best = int(keep[np.argmax(scores[keep])])
+            if isinstance(span, slice):
+                return span.start + best
+            return int(span[best])
+    return None
+
+
+def build_playlist(index, moods, start_bpm, end_bpm, length=100, seed_track_id=None,
+                   tolerance=BPM_TOLERANCE, bpm_weight=BPM_WEIGHT):
+    """Build a playlist that follows a mood schedule and a BPM ramp.
+
+    Each slot greedily takes the unused track closest in sound to the
+    previous one among the (at most MAX_CANDIDATES) tracks nearest the slot's
+    target BPM, so the cost per slot is independent of catalog size. A
+    recording never appears twice, including duplicates linked by
+    canonical_id. The playlist stops early if no unused track is left
+    near a slot's target BPM. Raises ValueError for a non-positive BPM or
+    an unknown seed track.
+    """
+    if not (np.isfinite(start_bpm) and np.isfinite(end_bpm) and start_bpm > 0 and end_bpm > 0):
+        raise ValueError("start_bpm and end_bpm must be positive")
+    targets = bpm_trajectory(start_bpm, end_bpm, length)
+    schedule = mood_schedule(moods, length)
+    # Rows per recording, so the number of used rows is known without a scan
+    group_sizes = np.bincount(index.groups) if len(index) else np.zeros(0, dtype=int)
+    used_groups = np.zeros(len(group_sizes), dtype=bool)
+    n_used = 0
+
+    rows = []
+    current = None
+    if seed_track_id is not None:
+        current = index.rows.get(seed_track_id)
+        if current is None:
+            raise ValueError(f"Unknown track: {seed_track_id}")
+        used_groups[index.groups[current]] = True
+        n_used += group_sizes[index.groups[current]]
+        rows.append(current)
+
+    for i in range(len(rows), length):
+        row = _next_track(index, current, targets[i], schedule[i], used_groups, n_used, tolerance, bpm_weight)
+        if row is None:
+            break
+        used_groups[index.groups[row]] = True
+        n_used += group_sizes[index.groups[row]]
+        rows.append(row)
+        current = row
+
+    return [
+        {
+            "track_id": str(index.track_ids[row]),
+            "mood": str(index.moods[row]),
+            "bpm": float(index.bpm[row]),
+            "target_bpm": float(targets[i])
+        }
+        for i, row in enumerate(rows)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a mood/tempo playlist from the catalog")
+    parser.add_argument("--moods", nargs="+", default=["calm", "energetic"])
+    parser.add_argument("--start-bpm", type=float, default=90)
+    parser.add_argument("--end-bpm", type=float, default=128)
+    parser.add_argument("--length", type=int, default=50)
+    parser.add_argument("--seed", dest="seed_track_id")
+    args = parser.parse_args()
+
+    playlist = build_playlist(
+        load_index(), args.moods, args.start_bpm, args.end_bpm, args.length, args.seed_track_id
+    )
+    for i, track in enumerate(playlist, 1):
+        print(f"{i:3d}. {track['track_id']:<40} {track['mood']:<10} {track['bpm']:6.1f} BPM")
@@ -0,0 +1,248 @@
+"""Per-stage profiling of feature extraction.
+
+Profile every audio file in a directory and print a stage breakdown:
+
+    python profile_extraction.py run catalog/audio --out profile.json --folded profile.folded
+
+Compare two extractor versions on the same corpus, live or from saved runs:
+
+    python profile_extraction.py run catalog/audio --extractor feature_extraction:extract_features \\
+        --extractor my_branch:extract_features
+    python profile_extraction.py compare before.json after.json
+
+The .folded output is collapsed-stack text for flamegraph.pl or speedscope.
+In-process, pass a StageProfiler to extract_features(path, profiler=...)
+and close it when done (or use it as a context manager):
+
+    with StageProfiler() as profiler:
+        extract_features(path, profiler=profiler)
+    print(format_summary(profiler.summary()))
+"""
+import argparse
+import importlib
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+AUDIO_SUFFIXES = (".wav", ".mp3")
+DEFAULT_EXTRACTOR = "feature_extraction:extract_features"
+
+
+class StageProfiler:
+    """Records wall time, CPU time and peak traced memory per stage.
+
+    Memory is measured with tracemalloc, which sees NumPy buffers but not
+    allocations made inside native decoders, and slows pure-Python code;
+    pass track_memory=False for cleaner timings. close() stops tracemalloc
+    again if this profiler was the one that started it.
+    """
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.records = []
+        self.current_file = None
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "file": self.current_file,
+                "stage": name,
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+                "peak_bytes": None
+            }
+            if self.track_memory:
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1] - base
+            self.records.append(record)
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stages(self):
+        """Stage names in first-seen order."""
+        return list(dict.fromkeys(r["stage"] for r in self.records))
+
+    def summary(self):
+        """Per-stage aggregates: calls, wall/CPU statistics and peak memory."""
+        totals = sum(r["wall"] for r in self.records) or 1.0
+        rows = []
+        for stage in self.stages():
+            recs = [r for r in self.records if r["stage"] == stage]
+            wall = np.array([r["wall"] for r in recs])
+            cpu = np.array([r["cpu"] for r in recs])
+            peaks = [r["peak_bytes"] for r in recs if r["peak_bytes"] is not None]
+            rows.append({
+                "stage": stage,
+                "calls": len(recs),
+                "wall_total": float(wall.sum()),
+                "wall_mean": float(wall.mean()),
+                "wall_p95": float(np.percentile(wall, 95)),
+                "cpu_mean": float(cpu.mean()),
+                "peak_mb": max(peaks) / 2 ** 20 if peaks else None,
+                "share": float(wall.sum()) / totals
+            })
+        return rows
+
+    def folded(self, root="extract_features"):
+        """Collapsed-stack lines ("root;stage microseconds") for flame graphs."""
+        return [
+            f"{root};{row['stage']} {int(round(row['wall_total'] * 1e6))}"
+            for row in self.summary()
+        ]
+
+
+def load_extractor(spec):
+    """Import 'module:function'."""
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name or "extract_features")
+
+
+def profile_corpus(files, extractor=DEFAULT_EXTRACTOR, track_memory=True, warmup=1):
+    """Run an extractor over files and return its StageProfiler.
+
+    The first `warmup` files are run once unrecorded so that lazy imports
+    and caches (librosa/numba compile on first use) don't skew the numbers.
+    Extractors that do not take a profiler argument are timed as one stage.
+    """
+    func = load_extractor(extractor)
+    staged = "profiler" in inspect.signature(func).parameters
+    profiler = StageProfiler(track_memory)
+
+    for path in files[:warmup]:
+        func(path)
+
+    with profiler:
+        for path in files:
+            profiler.current_file = path
+            if staged:
+                func(path, profiler=profiler)
+            else:
+                with profiler.stage(func.__name__):
+                    func(path)
+    return profiler
+
+
+def list_audio(directory, limit=None):
+    files = sorted(
+        os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(AUDIO_SUFFIXES)
+    )
+    return files[:limit] if limit else files
+
+
+def format_summary(rows, title=None):
+    lines = [title] if title else []
+    lines.append(f"{'stage':<22}{'calls':>7}{'total s':>10}{'mean ms':>10}{'p95 ms':>10}"
+                 f"{'cpu ms':>10}{'peak MB':>10}{'share':>8}")
+    for r in rows:
+        peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+        lines.append(f"{r['stage']:<22}{r['calls']:>7}{r['wall_total']:>10.2f}"
+                     f"{r['wall_mean'] * 1e3:>10.1f}{r['wall_p95'] * 1e3:>10.1f}"
+                     f"{r['cpu_mean'] * 1e3:>10.1f}{peak:>10}{r['share']:>8.0%}")
+    return "\n".join(lines)
+
+
+def format_comparison(before, after, labels=("before", "after")):
+    """Mean wall time per stage for two runs, with the after/before ratio."""
+    a = {r["stage"]: r for r in before}
+    b = {r["stage"]: r for r in after}
+    lines = [f"{'mean ms':<22}{labels[0][-12:]:>14}{labels[1][-12:]:>14}{'ratio':>8}"]
+    for stage in list(dict.fromkeys(list(a) + list(b))):
+        ma = a[stage]["wall_mean"] * 1e3 if stage in a else None
+        mb = b[stage]["wall_mean"] * 1e3 if stage in b else None
+        ratio = f"{mb / ma:.2f}x" if ma and mb is not None else "-"
+        ma = f"{ma:.1f}" if ma is not None else "-"
+        mb = f"{mb:.1f}" if mb is not None else "-"
+        lines.append(f"{stage:<22}{ma:>14}{mb:>14}{ratio:>8}")
+    total_a = sum(r["wall_total"] for r in before)
+    total_b = sum(r["wall_total"] for r in after)
+    lines.append(f"{'total s':<22}{total_a:>14.2f}{total_b:>14.2f}"
+                 f"{(f'{total_b / total_a:.2f}x' if total_a else '-'):>8}")
+    return "\n".join(lines)
+
+
+def save_profile(profiler, path, extractor):
+    with open(path, "w") as f:
+        json.dump({"extractor": extractor, "summary": profiler.summary(), "records": profiler.records}, f, indent=2)
+
+
+def _run(args):
+    files = list_audio(args.directory, args.limit)
+    if not files:
+        print(f"No audio files in {args.directory}")
+        return
+
+    extractors = args.extractor or [DEFAULT_EXTRACTOR]
+    summaries = []
+    for i, extractor in enumerate(extractors):
+        profiler = profile_corpus(files, extractor, track_memory=not args.no_memory, warmup=args.warmup)
+        summaries.append(profiler.summary())
+        print(format_summary(summaries[-1], f"\n{extractor} on {len(files)} files"))
+
+        suffix = f".{i}" if len(extractors) > 1 else ""
+        if args.out:
+            root, ext = os.path.splitext(args.out)
+            save_profile(profiler, f"{root}{suffix}{ext}", extractor)
+        if args.folded:
+            root, ext = os.path.splitext(args.folded)
+            with open(f"{root}{suffix}{ext}", "w") as f:
+                f.write("\n".join(profiler.folded(extractor.replace(";", "_"))) + "\n")
+
+    if len(summaries) == 2:
+        print("\n" + format_comparison(summaries[0], summaries[1], extractors))
+
+
+def _compare(args):
+    runs = []
+    for path in (args.before, args.after):
+        with open(path) as f:
+            runs.append(json.load(f))
+    print(format_comparison(runs[0]["summary"], runs[1]["summary"], (args.before, args.after)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile feature extraction stage by stage")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="profile extractor(s) over a directory of audio files")
+    run.add_argument("directory")
+    run.add_argument("--extractor", action="append",
+                     help=f"module:function to profile (repeat to compare; default {DEFAULT_EXTRACTOR})")
+    run.add_argument("--limit", type=int, help="only the first N files")
+    run.add_argument("--out", help="write summary and raw records as JSON")
+    run.add_argument("--folded", help="write collapsed stacks for flame graphs")
+    run.add_argument("--warmup", type=int, default=1, help="unrecorded warm-up files (default 1)")
+    run.add_argument("--no-memory", action="store_true", help="skip tracemalloc for cleaner timings")
+    run.set_defaults(func=_run)
+
+    compare = sub.add_parser("compare", help="compare two saved --out profiles")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.set_defaults(func=_compare)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,148 @@
+import atexit
+import os
+import threading
+import multiprocessing as mp
+import numpy as np
+from catalog_index import load_index
+
+DEFAULT_K = 5
+BPM_TOLERANCE = 0.08
+# Split catalog search across this many shard processes (see sharded_search.py)
+SEARCH_SHARDS = int(os.environ.get("SEARCH_SHARDS", "1"))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+class QueryEngine:
+    """Thread-safe top-k search with the same rules as matcher.recommend_tracks.
+
+    The catalog index keeps rows sorted by (mood, bpm), so the candidate
+    set for a query is a handful of contiguous slices and no masks or
+    DataFrames are built. Each thread scores into its own preallocated
+    buffer with np.dot(..., out=...), which runs in BLAS without the GIL,
+    so concurrent queries scale across cores and a query allocates only
+    its small result list.
+    """
+
+    def __init__(self, index, k=DEFAULT_K):
+        self.index = index
+        self.k = k
+        self._local = threading.local()
+
+    def _scratch(self):
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            n, d = self.index.features.shape
+            scratch = {
+                "scores": np.empty(n, dtype=np.float32),
+                "query": np.empty(d, dtype=np.float32)
+            }
+            self._local.scratch = scratch
+        return scratch
+
+    def _candidate_slices(self, bpm, mood):
+        """Mood + BPM window, falling back like recommend_tracks does."""
+        index = self.index
+        low, high = bpm * (1 - BPM_TOLERANCE), bpm * (1 + BPM_TOLERANCE)
+
+        if mood in index.mood_ranges:
+            slices = [index.bpm_window(low, high, mood)]
+        else:
+            slices = [index.bpm_window(low, high, m) for m in index.mood_ranges]
+
+        slices = [s for s in slices if s.stop > s.start]
+        return slices or [slice(0, len(index))]
+
+    def search(self, features, bpm, mood, k=None):
+        """Return [(track_id, score), ...] best first, one per recording."""
+        return self.search_slices(features, self._candidate_slices(float(bpm), mood), k)
+
+    def search_slices(self, features, slices, k=None):
+        """Top-k over the given row slices of the index."""
+        k = k or self.k
+        index = self.index
+        scratch = self._scratch()
+        scores, query = scratch["scores"], scratch["query"]
+
+        if len(features) != len(query):
+            raise ValueError(
+                f"Feature mismatch: input={len(features)}, catalog={len(query)}"
+            )
+        query[:] = features
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            np.divide(query, norm, out=query)
+
+        # Score each candidate slice into consecutive parts of the buffer
+        offsets = []
+        m = 0
+        for s in slices:
+            size = s.stop - s.start
+            np.dot(index.features[s], query, out=scores[m:m + size])
+            offsets.append((m, m + size, s.start))
+            m += size
+
+        # k passes of argmax beat a full argsort/argpartition for small k and
+        # allocate nothing; duplicates of an already chosen recording are skipped.
+        results = []
+        if m == 0:
+            return results
+        seen_groups = set()
+        view = scores[:m]
+        while len(results) < k:
+            pos = int(np.argmax(view))
+            score = float(view[pos])
+            if score == -np.inf:
+                break
+            view[pos] = -np.inf
+            for lo, hi, start in offsets:
+                if lo <= pos < hi:
+                    row = start + pos - lo
+                    break
+            group = index.groups[row]
+            if group in seen_groups:
+                continue
+            seen_groups.add(group)
+            results.append((str(index.track_ids[row]), score))
+        return results
+
+
+def get_engine():
+    """Query engine over the catalog index, built once per process.
+
+    With SEARCH_SHARDS > 1 the main process gets a ShardedSearch instead;
+    child processes (e.g. analysis pool workers) keep a plain QueryEngine
+    rather than each starting their own shards.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if SEARCH_SHARDS > 1 and mp.parent_process() is None:
+                from sharded_search import ShardedSearch
+                _engine = ShardedSearch.from_csv(SEARCH_SHARDS)
+                atexit.register(close_engine)
+            else:
+                _engine = QueryEngine(load_index())
+    return _engine
+
+
+def _forget_engine():
+    # A forked child inherits the parent's engine, including its shard pipes;
+    # replies would go to whichever process reads first. Start over instead.
+    global _engine, _engine_lock
+    _engine = None
+    _engine_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_engine)
+
+
+def close_engine():
+    """Stop the shard processes, if any; the next get_engine() rebuilds."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None and hasattr(_engine, "close"):
+            _engine.close()
+        _engine = None
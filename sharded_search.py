@@ -0,0 +1,245 @@
+import heapq
+import itertools
+import threading
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from catalog_index import CatalogIndex, CATALOG_PATH
+from query_engine import QueryEngine, DEFAULT_K, BPM_TOLERANCE
+
+# Shard replies to a "primary" query
+HIT = "hit"            # shard has the mood and tracks in the BPM window
+MOOD_ONLY = "mood"     # shard has the mood, but none in the BPM window
+NO_MOOD = "no_mood"    # shard lacks the mood; results are the BPM window over all moods
+
+
+class ShardError(RuntimeError):
+    """A shard process died or the search was closed."""
+
+
+def _shard_worker(conn, track_ids, moods, bpm, features, canonical_ids):
+    """Serve queries for one shard until a None message arrives.
+
+    Each query carries a request id that is sent back with its reply, so
+    the caller can match replies to queries from many threads.
+    """
+    engine = QueryEngine(CatalogIndex(track_ids, moods, bpm, features, canonical_ids))
+    index = engine.index
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        request_id, op, query, query_bpm, mood, k = message
+
+        if op == "all":
+            conn.send((request_id, (op, engine.search_slices(query, [slice(0, len(index))], k))))
+            continue
+
+        low, high = query_bpm * (1 - BPM_TOLERANCE), query_bpm * (1 + BPM_TOLERANCE)
+        if mood in index.mood_ranges:
+            window = index.bpm_window(low, high, mood)
+            if window.stop > window.start:
+                reply = (HIT, engine.search_slices(query, [window], k))
+            else:
+                reply = (MOOD_ONLY, [])
+        else:
+            windows = [index.bpm_window(low, high, m) for m in index.mood_ranges]
+            windows = [w for w in windows if w.stop > w.start]
+            reply = (NO_MOOD, engine.search_slices(query, windows, k))
+        conn.send((request_id, reply))
+    conn.close()
+
+
+class _Request:
+    """Replies for one query, filled in by the shard reader threads."""
+
+    def __init__(self, n_shards):
+        self.replies = [None] * n_shards
+        self.remaining = n_shards
+        self.done = threading.Event()
+
+
+class ShardedSearch:
+    """Catalog search split across worker processes.
+
+    Each shard process holds a slice of the catalog in its own QueryEngine.
+    Queries go to every shard over a pipe, shards answer in parallel, and
+    the per-shard top-k lists are merged. The mood/BPM fallback rules of
+    recommend_tracks are decided on the combined replies, so results match
+    a single QueryEngine over the whole catalog; the rare "no candidates
+    anywhere" case costs a second round trip. Duplicate recordings
+    (canonical_id) always live on the same shard.
+
+    Safe to call from many threads: queries are tagged with a request id
+    and a reader thread per shard hands each reply to its caller, so the
+    shards always have work queued while several queries are in flight.
+    """
+
+    def __init__(self, catalog, n_shards, k=DEFAULT_K):
+        catalog = catalog.copy()
+        catalog["bpm"] = pd.to_numeric(catalog["bpm"], errors="coerce")
+        catalog = catalog.dropna(subset=["bpm"])
+        feature_columns = [col for col in catalog.columns if col.startswith("f")]
+
+        key = catalog["canonical_id"] if "canonical_id" in catalog.columns else catalog["track_id"]
+        shard_of = pd.factorize(key)[0] % n_shards
+
+        self.k = k
+        self.n_features = len(feature_columns)
+        self._error = None
+        self._ids = itertools.count()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._conns = []
+        self._send_locks = []
+        self._procs = []
+        self._readers = []
+        for shard in range(n_shards):
+            part = catalog[shard_of == shard]
+            parent, child = mp.Pipe()
+            proc = mp.Process(
+                target=_shard_worker,
+                args=(
+                    child,
+                    part["track_id"].to_numpy(dtype=str),
+                    part["mood"].to_numpy(dtype=str),
+                    part["bpm"].to_numpy(dtype=np.float64),
+                    part[feature_columns].to_numpy(dtype=np.float32),
+                    part["canonical_id"].to_numpy(dtype=str) if "canonical_id" in part.columns else None
+                ),
+                daemon=True
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._send_locks.append(threading.Lock())
+            self._procs.append(proc)
+
+        for shard in range(n_shards):
+            reader = threading.Thread(target=self._read_replies, args=(shard,), daemon=True)
+            reader.start()
+            self._readers.append(reader)
+
+    @classmethod
+    def from_csv(cls, n_shards, path=CATALOG_PATH, k=DEFAULT_K):
+        return cls(pd.read_csv(path), n_shards, k)
+
+    def _read_replies(self, shard):
+        conn = self._conns[shard]
+        while True:
+            try:
+                request_id, reply = conn.recv()
+            except (EOFError, OSError):
+                self._fail(shard)
+                return
+            with self._pending_lock:
+                request = self._pending.get(request_id)
+                if request is None:
+                    # Already failed when another shard died
+                    continue
+                request.replies[shard] = reply
+                request.remaining -= 1
+                if request.remaining == 0:
+                    del self._pending[request_id]
+                    request.done.set()
+
+    def _fail(self, shard):
+        """Mark the search broken and wake every waiting caller.
+
+        A lost shard would leave its part of the catalog out of every
+        result, so no further queries are accepted until it is rebuilt.
+        """
+        proc = self._procs[shard]
+        proc.join(timeout=1)
+        with self._pending_lock:
+            self._error = self._error or f"Search shard {shard} died (exit code {proc.exitcode})"
+            for request in self._pending.values():
+                request.done.set()
+            self._pending.clear()
+
+    def _submit(self, op, features, bpm, mood, k):
+        """Send one query to every shard; returns its _Request."""
+        request = _Request(len(self._conns))
+        with self._pending_lock:
+            if self._error:
+                raise ShardError(self._error)
+            request_id = next(self._ids)
+            self._pending[request_id] = request
+
+        message = (request_id, op, np.asarray(features, dtype=np.float32), float(bpm), mood, k)
+        for shard, (conn, send_lock) in enumerate(zip(self._conns, self._send_locks)):
+            try:
+                with send_lock:
+                    conn.send(message)
+            except OSError:
+                self._fail(shard)
+                raise ShardError(self._error)
+        return request
+
+    def _wait(self, request):
+        request.done.wait()
+        if request.remaining:
+            raise ShardError(self._error)
+        return request.replies
+
+    @staticmethod
+    def _merge(replies, k):
+        return heapq.nlargest(k, (r for results in replies for r in results), key=lambda r: r[1])
+
+    def search_batch(self, queries, k=None):
+        """Search many (features, bpm, mood) queries; returns one list per query."""
+        k = k or self.k
+        queries = list(queries)
+        # A bad query would kill the shard, so check it here, like QueryEngine does
+        for features, _, _ in queries:
+            if len(features) != self.n_features:
+                raise ValueError(
+                    f"Feature mismatch: input={len(features)}, catalog={self.n_features}"
+                )
+
+        # Send everything first so the shards work through the batch in parallel
+        requests = [self._submit("primary", features, bpm, mood, k) for features, bpm, mood in queries]
+
+        results = [None] * len(queries)
+        fallback = []
+        for i, request in enumerate(requests):
+            replies = self._wait(request)
+            statuses = {status for status, _ in replies}
+            if HIT in statuses:
+                results[i] = self._merge([r for s, r in replies if s == HIT], k)
+            elif MOOD_ONLY not in statuses and any(r for _, r in replies):
+                results[i] = self._merge([r for _, r in replies], k)
+            else:
+                fallback.append((i, self._submit("all", *queries[i], k)))
+
+        for i, request in fallback:
+            results[i] = self._merge([r for _, r in self._wait(request)], k)
+        return results
+
+    def search(self, features, bpm, mood, k=None):
+        """Return [(track_id, score), ...] best first, like QueryEngine.search."""
+        return self.search_batch([(features, bpm, mood)], k)[0]
+
+    def close(self):
+        with self._pending_lock:
+            self._error = self._error or "Sharded search is closed"
+        for conn, send_lock in zip(self._conns, self._send_locks):
+            try:
+                with send_lock:
+                    conn.send(None)
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        for reader in self._readers:
+            reader.join(timeout=5)
+        for conn in self._conns:
+            conn.close()
+        self._conns, self._procs, self._readers = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,136 @@
+import librosa
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from analysis import load_models, CONFIDENCE_THRESHOLD
+
+WINDOW_SECONDS = 10.0
+HOP_SECONDS = 5.0
+MAX_DURATION = 600
+HOP_LENGTH = 512
+TEMPO_WIN_LENGTH = 384
+START_BPM = 120.0
+# A window whose BPM is this far (relative) from its segment's starts a new one
+SEGMENT_BPM_TOLERANCE = 0.08
+
+
+def _windows(x, win, hop):
+    """Strided (..., n_windows, win) view over the last axis; no copy."""
+    return sliding_window_view(x, win, axis=-1)[..., ::hop, :]
+
+
+def window_features(y, sr, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS):
+    """Return (starts, features, bpm, window) for sliding windows over a signal.
+
+    Frame-level MFCC, RMS, ZCR and tempogram are computed once for the whole
+    signal and aggregated per window, producing the same 30-feature layout
+    as extract_features for every window without re-decoding or
+    re-analyzing the audio.
+    """
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13, hop_length=HOP_LENGTH)
+    rms = librosa.feature.rms(y=y, hop_length=HOP_LENGTH)[0]
+    zcr = librosa.feature.zero_crossing_rate(y, hop_length=HOP_LENGTH)[0]
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=HOP_LENGTH)
+    tempogram = librosa.feature.tempogram(
+        onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH, win_length=TEMPO_WIN_LENGTH
+    )
+
+    n_frames = min(mfcc.shape[1], len(rms), len(zcr), tempogram.shape[1])
+    frames_per_second = sr / HOP_LENGTH
+    win = min(n_frames, max(1, int(round(window_seconds * frames_per_second))))
+    hop = max(1, int(round(hop_seconds * frames_per_second)))
+
+    mfcc_w = _windows(mfcc[:, :n_frames], win, hop)      # (13, n, win)
+    rms_w = _windows(rms[:n_frames], win, hop)           # (n, win)
+    zcr_w = _windows(zcr[:n_frames], win, hop)           # (n, win)
+    tempo_w = _windows(tempogram[:, :n_frames], win, hop).mean(axis=-1)  # (lags, n)
+
+    # Same log-normal tempo prior librosa.feature.tempo applies, evaluated
+    # for every window at once.
+    bpms = librosa.tempo_frequencies(tempogram.shape[0], sr=sr, hop_length=HOP_LENGTH)
+    with np.errstate(divide="ignore"):
+        prior = np.exp(-0.5 * (np.log2(bpms) - np.log2(START_BPM)) ** 2)
+    prior[~np.isfinite(bpms)] = 0
+    tempo = bpms[np.argmax(tempo_w * prior[:, None], axis=0)]
+
+    features = np.column_stack([
+        mfcc_w.mean(axis=-1).T,      # 13 features
+        mfcc_w.std(axis=-1).T,       # 13 features
+        tempo,                       # 1 feature
+        rms_w.mean(axis=-1),         # 1 feature
+        rms_w.std(axis=-1),          # 1 feature
+        zcr_w.mean(axis=-1)          # 1 feature
+    ])
+    starts = np.arange(len(features)) * hop / frames_per_second
+    return starts, features, tempo, win / frames_per_second
+
+
+def _segments(starts, ends, moods, confidence, bpm, bpm_tolerance=SEGMENT_BPM_TOLERANCE):
+    """Merge consecutive windows with the same mood and tempo into segments.
+
+    A window joins the current segment only if its BPM is within
+    bpm_tolerance of the segment's median so far, so tempo changes within
+    one mood still show up as separate segments.
+    """
+    segments = []
+    for i, mood in enumerate(moods):
+        same = False
+        if segments and segments[-1]["mood"] == mood:
+            seg_bpm = np.median(bpm[segments[-1]["_idx"]])
+            same = abs(bpm[i] - seg_bpm) <= bpm_tolerance * seg_bpm
+        if same:
+            seg = segments[-1]
+            seg["end"] = float(ends[i])
+            seg["_idx"].append(i)
+        else:
+            segments.append({"start": float(starts[i]), "end": float(ends[i]), "mood": mood, "_idx": [i]})
+
+    for seg in segments:
+        idx = seg.pop("_idx")
+        seg["confidence"] = float(np.mean(confidence[idx]))
+        seg["bpm"] = float(np.median(bpm[idx]))
+    return segments
+
+
+def mood_timeline(audio_path, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS, duration=MAX_DURATION):
+    """Return mood and BPM over time for an audio file, or None on failure.
+
+    All windows are classified with a single predict_proba call.
+    """
+    try:
+        y, sr = librosa.load(audio_path, duration=duration)
+        starts, features, bpm, window = window_features(y, sr, window_seconds, hop_seconds)
+
+        model, encoder = load_models()
+        probs = model.predict_proba(features)
+        mood_idx = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(probs)), mood_idx]
+        labels = encoder.inverse_transform(mood_idx)
+        moods = np.where(confidence < CONFIDENCE_THRESHOLD, "uncertain", labels).tolist()
+
+        track_end = len(y) / sr
+        ends = np.minimum(starts + window, track_end)
+
+        return {
+            "window": float(window),
+            "hop": float(hop_seconds),
+            "start": np.round(starts, 2).tolist(),
+            "mood": moods,
+            "confidence": np.round(confidence, 3).tolist(),
+            "bpm": np.round(bpm, 1).tolist(),
+            "segments": _segments(starts, ends, moods, confidence, bpm)
+        }
+
+    except Exception as e:
+        print(f"Error building mood timeline: {e}")
+        return None
+
+
+def format_timeline(timeline):
+    """One line per segment, for display in the UI."""
+    if not timeline or not timeline["segments"]:
+        return "No timeline available"
+    return "\n".join(
+        f"{int(s['start']) // 60}:{int(s['start']) % 60:02d}–{int(s['end']) // 60}:{int(s['end']) % 60:02d}  "
+        f"{s['mood'].title()} · {s['bpm']:.0f} BPM · {s['confidence'] * 100:.0f}%"
+        for s in timeline["segments"]
+    )